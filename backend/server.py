@@ -1,12 +1,15 @@
-from fastapi import FastAPI, HTTPException, Depends
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.middleware.gzip import GZipMiddleware
 from fastapi import APIRouter
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference, ReturnDocument
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
+import orjson
 import os
 import json
+import time
 from datetime import datetime, timezone
 import uuid
 from contextlib import asynccontextmanager
@@ -18,11 +21,30 @@ load_dotenv()
 # Import the emergentintegrations library
 from emergentintegrations.llm.openai import OpenAIChatRealtime
 
-# Database connection
+# Database connection — one shared client per worker process. The pool is
+# sized down from the default 100 so running several uvicorn workers does
+# not multiply idle sockets on the Mongo side.
 MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(MONGO_URL)
+client = AsyncIOMotorClient(
+    MONGO_URL,
+    maxPoolSize=20,
+    minPoolSize=2,
+    serverSelectionTimeoutMS=2000,
+    compressors="zstd"
+)
 db = client.ai_assistant
 
+# Read-side collection handles routed to secondaries when a replica set is
+# available; writes (and the save_memory upsert) stay on the primary
+conversations_read = db.get_collection(
+    "conversations", read_preference=ReadPreference.SECONDARY_PREFERRED)
+projects_read = db.get_collection(
+    "projects", read_preference=ReadPreference.SECONDARY_PREFERRED)
+tasks_read = db.get_collection(
+    "tasks", read_preference=ReadPreference.SECONDARY_PREFERRED)
+user_memory_read = db.get_collection(
+    "user_memory", read_preference=ReadPreference.SECONDARY_PREFERRED)
+
 # Initialize OpenAI Chat Realtime
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
 if not OPENAI_API_KEY:
@@ -35,6 +57,17 @@ else:
 async def lifespan(app: FastAPI):
     # Startup
     print("Starting AI Voice Assistant...")
+    # Create indexes matching the filter/sort shape of the hot queries so
+    # reads are served by IXSCAN instead of collection scans
+    await db.conversations.create_index([("user_id", 1), ("timestamp", -1)])
+    await db.projects.create_index([("user_id", 1)])
+    await db.projects.create_index([("id", 1)], unique=True)
+    await db.tasks.create_index([("user_id", 1), ("status", 1), ("created_at", -1)])
+    await db.tasks.create_index([("id", 1)], unique=True)
+    await db.user_memory.create_index(
+        [("user_id", 1), ("key", 1), ("category", 1)], unique=True
+    )
+    await db.user_memory.create_index([("user_id", 1), ("category", 1)])
     yield
     # Shutdown
     print("Shutting down AI Voice Assistant...")
@@ -44,20 +77,81 @@ app = FastAPI(
     title="AI Voice Assistant for Unity Development",
     description="Personal AI assistant with strong memory for game development",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Minimal pure-ASGI CORS middleware: answers preflights and stamps the
+# allow-origin header on response start without the coroutine overhead of
+# Starlette's CORSMiddleware
+class MinimalCORS:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS":
+            await send({
+                "type": "http.response.start",
+                "status": 204,
+                "headers": [
+                    (b"access-control-allow-origin", b"*"),
+                    (b"access-control-allow-methods", b"*"),
+                    (b"access-control-allow-headers", b"*"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                headers = message.setdefault("headers", [])
+                headers.append((b"access-control-allow-origin", b"*"))
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+app.add_middleware(MinimalCORS)
+
+# Compress the JSON list responses (~10x on repetitive documents); small
+# payloads like /api/health pass through uncompressed
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# In-process cache for coding preferences keyed by user_id. Entries hold
+# (expiry monotonic time, docs) and are invalidated on preference writes.
+PREF_CACHE_TTL = 60.0
+_pref_cache: Dict[str, tuple] = {}
+
+def now_utc() -> datetime:
+    """Per-request UTC clock, injectable so tests can substitute a fake"""
+    return datetime.now(timezone.utc)
+
+# Constant skeleton for generated Unity scripts; only the variable fields
+# are substituted per request
+SCRIPT_TEMPLATE = """using UnityEngine;
+
+public class {script_type} : MonoBehaviour
+{{
+    // {description}
+
+    void Start()
+    {{
+        // Initialization code here
+    }}
+
+    void Update()
+    {{
+        // Update logic here
+    }}
+}}"""
 
 # Pydantic models
 class ConversationMessage(BaseModel):
+    model_config = {"extra": "forbid"}
+
     id: str
     user_id: str
     message: str
@@ -66,6 +160,8 @@ class ConversationMessage(BaseModel):
     context: Optional[Dict[str, Any]] = None
 
 class UnityProject(BaseModel):
+    model_config = {"extra": "forbid"}
+
     id: str
     user_id: str
     name: str
@@ -76,6 +172,8 @@ class UnityProject(BaseModel):
     status: str = "active"
 
 class Task(BaseModel):
+    model_config = {"extra": "forbid"}
+
     id: str
     user_id: str
     title: str
@@ -87,6 +185,8 @@ class Task(BaseModel):
     project_id: Optional[str] = None
 
 class UserMemory(BaseModel):
+    model_config = {"extra": "forbid"}
+
     id: str
     user_id: str
     key: str
@@ -95,6 +195,11 @@ class UserMemory(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+# Fields clients are allowed to change through the PUT endpoints; anything
+# else in the body is dropped before it reaches $set
+PROJECT_UPDATABLE = {"name", "description", "status", "scripts"}
+TASK_UPDATABLE = {"title", "description", "priority", "status", "due_date", "project_id"}
+
 # Register OpenAI Realtime router
 router = APIRouter()
 if chat:
@@ -103,25 +208,56 @@ if chat:
 else:
     print("OpenAI realtime router not registered - API key missing")
 
+async def stream_json_array(cursor):
+    """Stream a Mongo cursor as a chunked JSON array.
+
+    Docs are encoded one at a time so server memory stays O(batch_size)
+    instead of buffering the whole result before serialization.
+    """
+    yield b"["
+    first = True
+    async for doc in cursor.batch_size(50):
+        if first:
+            first = False
+        else:
+            yield b","
+        yield orjson.dumps(doc)
+    yield b"]"
+
 # Memory and conversation endpoints
 @app.post("/api/conversations")
 async def save_conversation(conversation: ConversationMessage):
     """Save a conversation to memory"""
     try:
-        conversation_dict = conversation.dict()
+        conversation_dict = conversation.model_dump(mode="python", exclude_none=True)
         await db.conversations.insert_one(conversation_dict)
         return {"status": "success", "message": "Conversation saved"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/conversations/batch")
+async def save_conversations_batch(conversations: List[ConversationMessage]):
+    """Save a batch of conversations in a single round-trip"""
+    try:
+        if not conversations:
+            return {"status": "success", "inserted": 0}
+        docs = [conversation.model_dump(mode="python", exclude_none=True) for conversation in conversations]
+        result = await db.conversations.insert_many(docs, ordered=False)
+        return {"status": "success", "inserted": len(result.inserted_ids)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/conversations/{user_id}")
 async def get_conversations(user_id: str, limit: int = 50):
     """Get recent conversations for context"""
     try:
-        conversations = await db.conversations.find(
-            {"user_id": user_id}
+        conversations = await conversations_read.find(
+            {"user_id": user_id},
+            {"_id": 0, "id": 1, "message": 1, "response": 1, "timestamp": 1}
         ).sort("timestamp", -1).limit(limit).to_list(limit)
-        return conversations
+        # Direct ORJSONResponse skips the jsonable_encoder pass; the
+        # projection already stripped the non-serializable _id
+        return ORJSONResponse(content=conversations)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -130,7 +266,7 @@ async def get_conversations(user_id: str, limit: int = 50):
 async def create_project(project: UnityProject):
     """Create a new Unity project entry"""
     try:
-        project_dict = project.dict()
+        project_dict = project.model_dump(mode="python", exclude_none=True)
         await db.projects.insert_one(project_dict)
         return {"status": "success", "project": project_dict}
     except Exception as e:
@@ -140,23 +276,46 @@ async def create_project(project: UnityProject):
 async def get_projects(user_id: str):
     """Get all projects for a user"""
     try:
-        projects = await db.projects.find({"user_id": user_id}).to_list(100)
-        return projects
+        cursor = projects_read.find(
+            {"user_id": user_id},
+            {"_id": 0, "id": 1, "name": 1, "description": 1, "status": 1,
+             "created_at": 1, "last_modified": 1}
+        )
+        return StreamingResponse(stream_json_array(cursor),
+                                 media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/api/projects/{project_id}")
-async def update_project(project_id: str, update_data: Dict[str, Any]):
+async def update_project(project_id: str, request: Request):
     """Update project details"""
     try:
-        update_data["last_modified"] = datetime.now(timezone.utc)
-        result = await db.projects.update_one(
+        # Raw orjson decode skips FastAPI's body-validation pass; these are
+        # free-form dicts anyway. Only whitelisted fields reach $set, and
+        # $currentDate stamps last_modified server-side.
+        try:
+            update_data = orjson.loads(await request.body())
+        except orjson.JSONDecodeError:
+            raise HTTPException(status_code=422, detail="Invalid JSON body")
+        if not isinstance(update_data, dict):
+            raise HTTPException(status_code=422, detail="Body must be a JSON object")
+        clean = {k: v for k, v in update_data.items() if k in PROJECT_UPDATABLE}
+        # Mongo rejects an empty $set; with nothing updatable just bump
+        # last_modified, as the baseline behaviour did
+        update_doc = {"$currentDate": {"last_modified": True}}
+        if clean:
+            update_doc["$set"] = clean
+        project = await db.projects.find_one_and_update(
             {"id": project_id},
-            {"$set": update_data}
+            update_doc,
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
         )
-        if result.modified_count == 0:
+        if not project:
             raise HTTPException(status_code=404, detail="Project not found")
-        return {"status": "success", "message": "Project updated"}
+        return {"status": "success", "project": project}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -165,7 +324,7 @@ async def update_project(project_id: str, update_data: Dict[str, Any]):
 async def create_task(task: Task):
     """Create a new task"""
     try:
-        task_dict = task.dict()
+        task_dict = task.model_dump(mode="python", exclude_none=True)
         await db.tasks.insert_one(task_dict)
         return {"status": "success", "task": task_dict}
     except Exception as e:
@@ -178,22 +337,41 @@ async def get_tasks(user_id: str, status: Optional[str] = None):
         filter_dict = {"user_id": user_id}
         if status:
             filter_dict["status"] = status
-        tasks = await db.tasks.find(filter_dict).sort("created_at", -1).to_list(100)
-        return tasks
+        cursor = tasks_read.find(
+            filter_dict,
+            {"_id": 0, "id": 1, "title": 1, "status": 1, "priority": 1,
+             "created_at": 1, "due_date": 1}
+        ).sort("created_at", -1)
+        return StreamingResponse(stream_json_array(cursor),
+                                 media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/api/tasks/{task_id}")
-async def update_task(task_id: str, update_data: Dict[str, Any]):
+async def update_task(task_id: str, request: Request):
     """Update task status or details"""
     try:
-        result = await db.tasks.update_one(
+        try:
+            update_data = orjson.loads(await request.body())
+        except orjson.JSONDecodeError:
+            raise HTTPException(status_code=422, detail="Invalid JSON body")
+        if not isinstance(update_data, dict):
+            raise HTTPException(status_code=422, detail="Body must be a JSON object")
+        clean = {k: v for k, v in update_data.items() if k in TASK_UPDATABLE}
+        if not clean:
+            raise HTTPException(status_code=422,
+                                detail="No updatable fields in request body")
+        task = await db.tasks.find_one_and_update(
             {"id": task_id},
-            {"$set": update_data}
+            {"$set": clean},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
         )
-        if result.modified_count == 0:
+        if not task:
             raise HTTPException(status_code=404, detail="Task not found")
-        return {"status": "success", "message": "Task updated"}
+        return {"status": "success", "task": task}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -202,7 +380,7 @@ async def update_task(task_id: str, update_data: Dict[str, Any]):
 async def save_memory(memory: UserMemory):
     """Save user memory/preferences"""
     try:
-        memory_dict = memory.dict()
+        memory_dict = memory.model_dump(mode="python", exclude_none=True)
         # Upsert based on user_id, key, and category
         await db.user_memory.update_one(
             {
@@ -213,6 +391,9 @@ async def save_memory(memory: UserMemory):
             {"$set": memory_dict},
             upsert=True
         )
+        # Keep the generate-script cache consistent with preference writes
+        if memory.category == "coding_preferences":
+            _pref_cache.pop(memory.user_id, None)
         return {"status": "success", "message": "Memory saved"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -224,50 +405,70 @@ async def get_memory(user_id: str, category: Optional[str] = None):
         filter_dict = {"user_id": user_id}
         if category:
             filter_dict["category"] = category
-        memories = await db.user_memory.find(filter_dict).to_list(100)
-        return memories
+        cursor = user_memory_read.find(
+            filter_dict,
+            {"_id": 0, "id": 1, "key": 1, "value": 1, "category": 1, "updated_at": 1}
+        )
+        return StreamingResponse(stream_json_array(cursor),
+                                 media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def get_coding_preferences(user_id: str) -> List[Dict[str, Any]]:
+    """Fetch a user's coding preferences, cached in-process for a short TTL.
+
+    Preferences change rarely, so repeat generate-script calls for the same
+    user skip the Mongo round-trip. The (user_id, category) index plus the
+    key/value projection keeps the cold path cheap.
+    """
+    cached = _pref_cache.get(user_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    preferences = await user_memory_read.find(
+        {"user_id": user_id, "category": "coding_preferences"},
+        {"_id": 0, "key": 1, "value": 1}
+    ).limit(10).to_list(10)
+    _pref_cache[user_id] = (time.monotonic() + PREF_CACHE_TTL, preferences)
+    return preferences
+
 # Unity-specific endpoints
 @app.post("/api/generate-script")
-async def generate_unity_script(request: Dict[str, Any]):
+async def generate_unity_script(request: Request,
+                                now: datetime = Depends(now_utc)):
     """Generate Unity C# script based on requirements"""
     try:
-        user_id = request.get("user_id")
-        script_type = request.get("script_type")
-        description = request.get("description")
+        try:
+            body = orjson.loads(await request.body())
+        except orjson.JSONDecodeError:
+            raise HTTPException(status_code=422, detail="Invalid JSON body")
+        if not isinstance(body, dict):
+            raise HTTPException(status_code=422, detail="Body must be a JSON object")
+        user_id = body.get("user_id")
+        script_type = body.get("script_type")
+        description = body.get("description")
+        if not (user_id and script_type and description):
+            raise HTTPException(
+                status_code=422,
+                detail="user_id, script_type and description are required"
+            )
         
         # Get user's coding preferences from memory
-        preferences = await db.user_memory.find({
-            "user_id": user_id,
-            "category": "coding_preferences"
-        }).to_list(10)
-        
+        preferences = await get_coding_preferences(user_id)
+
         # Here you would typically call the AI to generate the script
         # For now, return a template response
-        script_template = f"""using UnityEngine;
+        script_template = SCRIPT_TEMPLATE.format_map({
+            "script_type": script_type,
+            "description": description
+        })
 
-public class {script_type} : MonoBehaviour
-{{
-    // {description}
-    
-    void Start()
-    {{
-        // Initialization code here
-    }}
-    
-    void Update()
-    {{
-        // Update logic here
-    }}
-}}"""
-        
         return {
             "status": "success",
             "script": script_template,
-            "generated_at": datetime.now(timezone.utc).isoformat()
+            "generated_at": now
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -278,4 +479,12 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8001,
+        loop="uvloop",
+        http="httptools",
+        log_level="warning",
+        access_log=False
+    )
\ No newline at end of file
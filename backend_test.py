@@ -1,9 +1,11 @@
-import requests
+import asyncio
 import sys
 import json
 from datetime import datetime, timezone
 import uuid
 
+import httpx
+
 class AIVoiceAssistantTester:
     def __init__(self, base_url="https://2867aa8a-d790-4560-bca8-0aa95bc7839e.preview.emergentagent.com"):
         self.base_url = base_url
@@ -11,23 +13,16 @@ class AIVoiceAssistantTester:
         self.tests_passed = 0
         self.user_id = "unity_dev_001"  # Test user ID as specified
 
-    def run_test(self, name, method, endpoint, expected_status, data=None, headers=None):
+    async def run_test(self, client, name, method, endpoint, expected_status, data=None):
         """Run a single API test"""
         url = f"{self.base_url}/{endpoint}"
-        if headers is None:
-            headers = {'Content-Type': 'application/json'}
 
         self.tests_run += 1
         print(f"\n🔍 Testing {name}...")
         print(f"   URL: {url}")
-        
+
         try:
-            if method == 'GET':
-                response = requests.get(url, headers=headers, timeout=10)
-            elif method == 'POST':
-                response = requests.post(url, json=data, headers=headers, timeout=10)
-            elif method == 'PUT':
-                response = requests.put(url, json=data, headers=headers, timeout=10)
+            response = await client.request(method, url, json=data)
 
             success = response.status_code == expected_status
             if success:
@@ -48,17 +43,18 @@ class AIVoiceAssistantTester:
             print(f"❌ Failed - Error: {str(e)}")
             return False, {}
 
-    def test_health_check(self):
+    async def test_health_check(self, client):
         """Test health endpoint"""
-        return self.run_test(
+        return await self.run_test(
+            client,
             "Health Check",
             "GET",
             "api/health",
             200
         )
 
-    def test_create_conversation(self):
-        """Test creating a conversation"""
+    async def test_conversation_chain(self, client):
+        """Test creating then listing conversations"""
         conversation_data = {
             "id": f"conv_{uuid.uuid4()}",
             "user_id": self.user_id,
@@ -67,27 +63,25 @@ class AIVoiceAssistantTester:
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "context": {"topic": "unity_help"}
         }
-        
-        success, response = self.run_test(
+
+        await self.run_test(
+            client,
             "Create Conversation",
             "POST",
             "api/conversations",
             200,
             data=conversation_data
         )
-        return success, conversation_data["id"] if success else None
-
-    def test_get_conversations(self):
-        """Test getting conversations for user"""
-        return self.run_test(
+        await self.run_test(
+            client,
             "Get Conversations",
             "GET",
             f"api/conversations/{self.user_id}",
             200
         )
 
-    def test_create_project(self):
-        """Test creating a Unity project"""
+    async def test_project_chain(self, client):
+        """Test creating, listing and updating a project"""
         project_data = {
             "id": f"project_{uuid.uuid4()}",
             "user_id": self.user_id,
@@ -98,46 +92,39 @@ class AIVoiceAssistantTester:
             "scripts": [],
             "status": "active"
         }
-        
-        success, response = self.run_test(
+
+        success, _ = await self.run_test(
+            client,
             "Create Project",
             "POST",
             "api/projects",
             200,
             data=project_data
         )
-        return success, project_data["id"] if success else None
-
-    def test_get_projects(self):
-        """Test getting projects for user"""
-        return self.run_test(
+        await self.run_test(
+            client,
             "Get Projects",
             "GET",
             f"api/projects/{self.user_id}",
             200
         )
-
-    def test_update_project(self, project_id):
-        """Test updating a project"""
-        if not project_id:
-            print("⚠️  Skipping project update test - no project ID available")
-            return False, {}
-            
-        update_data = {
-            "description": "Updated description for the test project",
-            "status": "in_progress"
-        }
-        
-        return self.run_test(
+        if not success:
+            print("⚠️  Skipping project update test - project create failed")
+            return
+        await self.run_test(
+            client,
             "Update Project",
             "PUT",
-            f"api/projects/{project_id}",
+            f"api/projects/{project_data['id']}",
             200,
-            data=update_data
+            data={
+                "description": "Updated description for the test project",
+                "status": "in_progress"
+            }
         )
 
-    def test_create_task(self):
-        """Test creating a task"""
+    async def test_task_chain(self, client):
+        """Test creating, listing and updating a task"""
         task_data = {
             "id": f"task_{uuid.uuid4()}",
             "user_id": self.user_id,
@@ -149,46 +136,39 @@ class AIVoiceAssistantTester:
             "due_date": None,
             "project_id": None
         }
-        
-        success, response = self.run_test(
+
+        success, _ = await self.run_test(
+            client,
             "Create Task",
             "POST",
             "api/tasks",
             200,
             data=task_data
         )
-        return success, task_data["id"] if success else None
-
-    def test_get_tasks(self):
-        """Test getting tasks for user"""
-        return self.run_test(
+        await self.run_test(
+            client,
             "Get Tasks",
             "GET",
             f"api/tasks/{self.user_id}",
             200
         )
-
-    def test_update_task(self, task_id):
-        """Test updating a task"""
-        if not task_id:
-            print("⚠️  Skipping task update test - no task ID available")
-            return False, {}
-            
-        update_data = {
-            "status": "completed",
-            "priority": "medium"
-        }
-        
-        return self.run_test(
+        if not success:
+            print("⚠️  Skipping task update test - task create failed")
+            return
+        await self.run_test(
+            client,
             "Update Task",
             "PUT",
-            f"api/tasks/{task_id}",
+            f"api/tasks/{task_data['id']}",
             200,
-            data=update_data
+            data={
+                "status": "completed",
+                "priority": "medium"
+            }
         )
 
-    def test_create_memory(self):
-        """Test creating user memory"""
+    async def test_memory_chain(self, client):
+        """Test creating then reading user memory"""
         memory_data = {
             "id": f"memory_{uuid.uuid4()}",
             "user_id": self.user_id,
@@ -198,33 +178,33 @@ class AIVoiceAssistantTester:
             "created_at": datetime.now(timezone.utc).isoformat(),
             "updated_at": datetime.now(timezone.utc).isoformat()
         }
-        
-        return self.run_test(
+
+        await self.run_test(
+            client,
             "Create Memory",
             "POST",
             "api/memory",
             200,
             data=memory_data
         )
-
-    def test_get_memory(self):
-        """Test getting user memory"""
-        return self.run_test(
+        await self.run_test(
+            client,
             "Get Memory",
             "GET",
             f"api/memory/{self.user_id}",
             200
         )
 
-    def test_generate_script(self):
+    async def test_generate_script(self, client):
         """Test Unity script generation"""
         script_data = {
             "user_id": self.user_id,
             "script_type": "PlayerController",
             "description": "A basic player controller for 2D platformer game"
         }
-        
-        return self.run_test(
+
+        return await self.run_test(
+            client,
             "Generate Unity Script",
             "POST",
             "api/generate-script",
@@ -232,9 +212,10 @@ class AIVoiceAssistantTester:
             data=script_data
         )
 
-    def test_realtime_session(self):
+    async def test_realtime_session(self, client):
         """Test OpenAI realtime session creation"""
-        return self.run_test(
+        return await self.run_test(
+            client,
             "OpenAI Realtime Session",
             "POST",
             "api/v1/realtime/session",
@@ -242,48 +223,35 @@ class AIVoiceAssistantTester:
             data={}
         )
 
-def main():
+async def main():
     print("🚀 Starting AI Voice Assistant Backend Tests")
     print("=" * 60)
-    
-    tester = AIVoiceAssistantTester()
-    
-    # Test health check first
-    health_success, _ = tester.test_health_check()
-    if not health_success:
-        print("❌ Health check failed - backend may not be running")
-        return 1
 
-    # Test conversation endpoints
-    conv_success, conv_id = tester.test_create_conversation()
-    tester.test_get_conversations()
-
-    # Test project endpoints
-    proj_success, proj_id = tester.test_create_project()
-    tester.test_get_projects()
-    if proj_success:
-        tester.test_update_project(proj_id)
-
-    # Test task endpoints
-    task_success, task_id = tester.test_create_task()
-    tester.test_get_tasks()
-    if task_success:
-        tester.test_update_task(task_id)
-
-    # Test memory endpoints
-    tester.test_create_memory()
-    tester.test_get_memory()
+    tester = AIVoiceAssistantTester()
 
-    # Test Unity script generation
-    tester.test_generate_script()
+    # One persistent HTTP/2 connection for the whole run; ordered chains
+    # (create → list → update) stay sequential internally while the
+    # independent chains run concurrently
+    async with httpx.AsyncClient(http2=True, timeout=10) as client:
+        # Test health check first
+        health_success, _ = await tester.test_health_check(client)
+        if not health_success:
+            print("❌ Health check failed - backend may not be running")
+            return 1
 
-    # Test OpenAI realtime session (may fail if API key issues)
-    tester.test_realtime_session()
+        await asyncio.gather(
+            tester.test_conversation_chain(client),
+            tester.test_project_chain(client),
+            tester.test_task_chain(client),
+            tester.test_memory_chain(client),
+            tester.test_generate_script(client),
+            tester.test_realtime_session(client),
+        )
 
     # Print final results
     print("\n" + "=" * 60)
     print(f"📊 Final Results: {tester.tests_passed}/{tester.tests_run} tests passed")
-    
+
     if tester.tests_passed == tester.tests_run:
         print("🎉 All tests passed!")
         return 0
@@ -293,4 +261,4 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(asyncio.run(main()))